@@ -1,11 +1,25 @@
 import os
 import pandas as pd
-import json
+import numpy as np
+import orjson
 import re
-from typing import Dict, List, Set, Any
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Set, Any, Tuple
 import warnings
+import openpyxl
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 warnings.filterwarnings('ignore')
 
+# pandas读取Excel时默认视为缺失值的文本，直接读取单元格时同样按空单元格处理
+_NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
 class ExcelColumnExtractor:
     def __init__(self, keywords: List[str] = None, white_list_keywords: List[str] = None):
         """
@@ -16,10 +30,32 @@ class ExcelColumnExtractor:
         """
         self.keywords = keywords
         self.white_list_keywords = white_list_keywords
+        # 关键词统一转小写后编译为一个正则，列名只需匹配一次
+        self._skip_re = self._compile_keywords(keywords)
+        self._white_list_re = self._compile_keywords(white_list_keywords)
         self.all_data: Dict[str, Set[Any]] = {}
+        # 需要剔除的单元格文本：包含中文或仅为"-"
+        self._reject_re = re.compile(r'[\u4e00-\u9fff]|^-$')
+        self._cn_re = re.compile(r'[\u4e00-\u9fff]')
+        # 已有"标准"值构建的多模式匹配自动机，标准有新增时置空重建
+        self._standard_automaton = None
+    def _compile_keywords(self, keywords: List[str]):
+        """将关键词列表编译为小写的多选正则，列表为空时返回None"""
+        if not keywords:
+            return None
+        return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
     def contains_chinese(self, text):
         """检查字符串是否包含中文"""
-        return bool(re.search('[\u4e00-\u9fff]', text))
+        return bool(self._cn_re.search(text))
+    def is_number(self, value) -> bool:
+        """数值单元格，或含小数点时可按float、否则可按int解析的文本，都视为数值"""
+        if isinstance(value, (int, float)):
+            return True
+        try:
+            float(value) if '.' in str(value) else int(value)
+            return True
+        except (ValueError, TypeError):
+            return False
     def is_in_white_list(self, column_name: str) -> bool:
         """
         判断该列是否在白名单中 
@@ -34,54 +70,55 @@ class ExcelColumnExtractor:
             return False;
             
         column_name_str = str(column_name)
-        for keyword in self.white_list_keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
-        return False
+        return self._white_list_re is not None and bool(self._white_list_re.search(column_name_str.lower()))
     def read_json_file(self):
         """读取JSON文件并返回数据"""
         current_working_dir = os.path.join(os.getcwd(), "extracted_columns.json")
         try:
-            with open(current_working_dir, 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            with open(current_working_dir, 'rb') as file:
+                data = orjson.loads(file.read())
             return data
         except Exception as e:
             print(f"读取文件时出错: {e}")
             return None
     
-    def is_header_row(self, df_slice: pd.DataFrame, row_index: int) -> bool:
+    def cell_type_codes(self, df_slice: pd.DataFrame) -> np.ndarray:
         """
-        判断某行是否为表头行
+        计算单元格类型编码矩阵
         
         Args:
             df_slice: DataFrame切片（前10行）
+            
+        Returns:
+            np.ndarray: 与切片同形状的int8矩阵，0为空，1为字符串，2为其他类型
+        """
+        to_code = np.vectorize(lambda v: 0 if pd.isna(v) else (1 if isinstance(v, str) else 2), otypes=[np.int8])
+        return to_code(df_slice.values)
+    
+    def is_header_row(self, types: np.ndarray, row_index: int) -> bool:
+        """
+        判断某行是否为表头行
+        
+        Args:
+            types: 前10行的单元格类型编码矩阵
             row_index: 当前行索引
             
         Returns:
             bool: 是否为表头行
         """
-        if row_index >= len(df_slice) - 1:
+        if row_index >= len(types) - 1:
             return False
             
-        current_row = df_slice.iloc[row_index]
-        next_row = df_slice.iloc[row_index + 1]
-        
         # 计算当前行非空单元格数量
-        non_empty_cells = current_row.dropna()
-        if len(non_empty_cells) == 0:
+        non_empty_cells = np.count_nonzero(types[row_index])
+        if non_empty_cells == 0:
             return False
             
         # 计算字符串类型单元格比例
-        string_cells = 0
-        for cell in non_empty_cells:
-            if isinstance(cell, str):
-                string_cells += 1
-        
-        string_ratio = string_cells / len(non_empty_cells)
+        string_ratio = np.count_nonzero(types[row_index] == 1) / non_empty_cells
         
         # 检查下一行是否有数值或非空内容
-        next_row_non_empty = next_row.dropna()
-        has_next_row_data = len(next_row_non_empty) > 0
+        has_next_row_data = np.count_nonzero(types[row_index + 1]) > 0
         
         # 判断条件：字符串比例超过50%且下一行有数据
         return string_ratio > 0.5 and has_next_row_data
@@ -96,11 +133,12 @@ class ExcelColumnExtractor:
         Returns:
             int: 表头行索引
         """
-        # 只检查前10行
+        # 只检查前10行，类型编码只计算一次
         check_rows = min(10, len(df))
+        types = self.cell_type_codes(df.iloc[:check_rows])
         
         for i in range(check_rows - 1):
-            if self.is_header_row(df.iloc[:check_rows], i):
+            if self.is_header_row(types, i):
                 return i
         
         # 如果没有找到符合条件表头，默认使用第一行
@@ -147,32 +185,99 @@ class ExcelColumnExtractor:
             return False
             
         column_name_str = str(column_name)
-        for keyword in self.keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
+        if self._skip_re is not None and self._skip_re.search(column_name_str.lower()):
+            return True
         if not self.contains_chinese(column_name_str): 
             return True
         return False
     
-    def process_excel_file(self, file_path: str):
+    def _iter_sheet_rows(self, file_path: str) -> Iterator[Tuple[str, Iterator[tuple]]]:
         """
-        处理单个Excel文件
+        逐个工作表流式读取行数据，整个工作簿只解析一次
         
         Args:
             file_path: Excel文件路径
+            
+        Returns:
+            Iterator: (工作表名, 行迭代器)，空单元格为None
         """
-        try:
-            # 获取工作表数量和信息
-            excel_file = pd.ExcelFile(file_path)
-            num_sheets = len(excel_file.sheet_names)
+        if file_path.lower().endswith('.xls'):
+            # xlrd只在读取xls时才需要，只有xlsx的文件夹不依赖它
+            import xlrd
+            book = xlrd.open_workbook(file_path, on_demand=True)
+            try:
+                for sheet in book.sheets():
+                    yield sheet.name, (self._xls_row_values(sheet, r) for r in range(sheet.nrows))
+            finally:
+                book.release_resources()
+        else:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+            try:
+                for worksheet in workbook.worksheets:
+                    # 只读模式下sheet记录的尺寸可能过时，与pandas一样先重置，按实际数据范围读取
+                    worksheet.reset_dimensions()
+                    yield worksheet.title, (self._xlsx_row_values(row) for row in worksheet.iter_rows())
+            finally:
+                workbook.close()
+
+    def _xlsx_row_values(self, row: tuple) -> tuple:
+        """读取xlsx的一行，空单元格、错误单元格和缺失值文本转为None（与pandas一致）"""
+        values = []
+        for cell in row:
+            value = cell.value
+            if cell.data_type == 'e' or (isinstance(value, str) and value in _NA_STRINGS):
+                value = None
+            values.append(value)
+        return tuple(values)
+
+    def _xls_row_values(self, sheet, row_index: int) -> tuple:
+        """读取xls的一行，空单元格、错误单元格和缺失值文本转为None，整数值的浮点数转为int，日期转为datetime（与pandas一致）"""
+        import xlrd
+        values = []
+        for cell in sheet.row(row_index):
+            value = cell.value
+            if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                value = None
+            elif cell.ctype == xlrd.XL_CELL_TEXT and value in _NA_STRINGS:
+                value = None
+            elif cell.ctype == xlrd.XL_CELL_DATE:
+                # 超出范围的日期序号无法转换，与pandas一样保留原始数值
+                try:
+                    value = xlrd.xldate_as_datetime(value, sheet.book.datemode)
+                except OverflowError:
+                    pass
+                else:
+                    # 只有时间没有日期的单元格落在纪元当天，与pandas一样转为time
+                    if value.timetuple()[0:3] == ((1904, 1, 1) if sheet.book.datemode else (1899, 12, 31)):
+                        value = value.time()
+            elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                value = bool(value)
+            elif cell.ctype == xlrd.XL_CELL_NUMBER and float(value).is_integer():
+                value = int(value)
+            values.append(value)
+        return tuple(values)
 
-            for i in range(num_sheets):
-                # 读取Excel文件的第一个工作表
-                df = pd.read_excel(file_path, sheet_name=i, header=None)
+    def process_excel_file(self, file_path: str) -> Dict[str, Set[str]]:
+        """
+        处理单个Excel文件，不修改提取器状态，便于在子进程中执行
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            Dict[str, Set[str]]: 该文件各列提取到的去重值
+        """
+        file_data: Dict[str, Set[str]] = {}
+        try:
+            for sheet_name, rows in self._iter_sheet_rows(file_path):
+                # 只缓存前10行用于查找表头，其余行直接流式处理
+                rows = iter(rows)
+                head_rows = list(islice(rows, 10))
+                df = pd.DataFrame(head_rows)
                 
                 if df.empty:
-                    print(f"警告: 文件 {file_path} 为空")
-                    return
+                    print(f"警告: 文件 {file_path} 的工作表 {sheet_name} 为空")
+                    continue
                 
                 # 查找表头行
                 header_row_index = self.find_header_row(df)
@@ -183,67 +288,91 @@ class ExcelColumnExtractor:
                 data_start_row = header_row_index + 1
                 
                 if data_start_row >= len(df):
-                    print(f"警告: 文件 {file_path} 没有数据行")
-                    return
+                    print(f"警告: 文件 {file_path} 的工作表 {sheet_name} 没有数据行")
+                    continue
                 
                 first_data_row = df.iloc[data_start_row]
                 
                 # 处理表头
                 column_names = self.process_header(header_row, first_data_row)
                 
-                # 读取数据（跳过表头行）
-                data_df = pd.read_excel(file_path, sheet_name=0, header=None, 
-                                    skiprows=data_start_row)
+                # 先按列名筛选，只收集需要的列的数据（跳过表头行）
+                keep_idx = [col_idx for col_idx, col_name in enumerate(column_names)
+                            if self.is_in_white_list(col_name) and not self.should_skip_column(col_name)]
+                if not keep_idx:
+                    continue
+                
+                columns_data: Dict[int, List[Any]] = {col_idx: [] for col_idx in keep_idx}
+                for row in chain(head_rows[data_start_row:], rows):
+                    row_width = len(row)
+                    for col_idx in keep_idx:
+                        if col_idx < row_width and row[col_idx] is not None:
+                            columns_data[col_idx].append(row[col_idx])
                 
                 # 处理每一列
-                for col_idx, col_name in enumerate(column_names):
-                    if col_idx >= data_df.shape[1]:
-                        continue
-                        
-                    if self.should_skip_column(col_name):
-                        continue
-                    if not self.is_in_white_list(col_name):
-                        continue
-                    # 获取该列数据并去重
-                    column_data = data_df.iloc[:, col_idx].dropna()
+                for col_idx in keep_idx:
+                    col_name = column_names[col_idx]
+                    column_data = columns_data[col_idx]
                     
-                    # 转换为合适的类型并去重
-                    processed_data = set()
-                    for item in column_data:
-                        if pd.isna(item):
-                            continue
-                        
-                        # 尝试转换为数值类型
-                        try:
-                            if isinstance(item, (int, float)):
-                                continue
-                            else:
-                                processed_item = float(item) if '.' in str(item) else int(item)
-                                continue
-                        except (ValueError, TypeError):
-                            item = str(item).strip()
-                            if self.contains_chinese(item):
-                                continue
-                            if item == '-':
-                                continue
-                            # 如果转换失败，保持原样
-                            processed_data.add(item)
+                    # 整列都是数值（含布尔）时直接跳过，不必再逐个判断
+                    column_data = pd.Series(column_data, dtype=object)
+                    if column_data.infer_objects().dtype.kind in 'ifb':
+                        continue
                     
-                    # 合并到总数据中
-                    if col_name not in self.all_data:
-                        self.all_data[col_name] = set()
-
-                    if col_name == '标准' and self.all_data['标准'] is not None:
-                        for item in processed_data.copy():
-                            for item2 in self.all_data['标准']:
-                                if item2 in item:
-                                    processed_data.remove(item)
-                                    break
-
-                    self.all_data[col_name].update(processed_data)
+                    # 数值及可转换为数值的文本直接跳过，其余文本去掉首尾空格后整列过滤
+                    is_number = column_data.map(self.is_number).astype(bool)
+                    text_data = column_data[~is_number].astype(str).str.strip()
+                    text_data = text_data[~text_data.str.contains(self._reject_re)]
+                    file_data.setdefault(col_name, set()).update(text_data.tolist())
                 
         except Exception as e:
             print(f"处理文件 {file_path} 时出错: {str(e)}")
+        return file_data
+    
+    def merge_file_data(self, file_data: Dict[str, Set[str]]):
+        """
+        将单个文件的提取结果合并到总数据中
+        
+        Args:
+            file_data: process_excel_file 的返回值
+        """
+        for col_name, processed_data in file_data.items():
+            existing = self.all_data.setdefault(col_name, set())
+
+            if col_name == '标准' and existing:
+                processed_data = self.drop_known_standards(processed_data)
+                if not processed_data <= existing:
+                    self._standard_automaton = None
+
+            existing.update(processed_data)
+    
+    def drop_known_standards(self, values: Set[str]) -> Set[str]:
+        """
+        去掉包含任一已有标准的值
+        
+        已有标准用Aho-Corasick自动机一次线性扫描，未安装pyahocorasick时逐个比较
+        
+        Args:
+            values: 本文件提取到的标准值
+            
+        Returns:
+            Set[str]: 不包含已有标准的值
+        """
+        standards = self.all_data['标准']
+        if ahocorasick is None:
+            return {item for item in values if not any(standard in item for standard in standards)}
+        
+        if self._standard_automaton is None:
+            automaton = ahocorasick.Automaton()
+            for standard in standards:
+                automaton.add_word(standard, standard)
+            if len(automaton) == 0:
+                return values
+            automaton.make_automaton()
+            self._standard_automaton = automaton
+        
+        automaton = self._standard_automaton
+        return {item for item in values if next(automaton.iter(item), None) is None}
     
     def process_folder(self, folder_path: str):
         """
@@ -256,11 +385,10 @@ class ExcelColumnExtractor:
             print(f"错误: 文件夹路径 {folder_path} 不存在")
             return
         
-        # 查找所有Excel文件
-        excel_files = []
-        for file in os.listdir(folder_path):
-            if file.endswith(('.xlsx', '.xls')):
-                excel_files.append(os.path.join(folder_path, file))
+        # 查找所有Excel文件（扩展名不区分大小写）
+        with os.scandir(folder_path) as entries:
+            excel_files = [entry.path for entry in entries
+                           if entry.is_file() and entry.name.lower().endswith(('.xlsx', '.xls', '.xlsm'))]
         
         if not excel_files:
             print(f"在文件夹 {folder_path} 中未找到Excel文件")
@@ -273,14 +401,13 @@ class ExcelColumnExtractor:
             self.all_data = orign_map_data
             for col_name, values in orign_map_data.items():
                 self.all_data[col_name] = set(values)
-        # 处理每个文件
-        for file_path in excel_files:
-            print(f"正在处理: {os.path.basename(file_path)}")
-            self.process_excel_file(file_path)
-
-        for col_name, values in self.all_data.items():
-            self.all_data[col_name] = sorted(values)
-        self.all_data = {key: value for key, value in self.all_data.items() if value}
+            # all_data 已整体替换，按新的"标准"值重建自动机
+            self._standard_automaton = None
+        # 多进程并行解析各文件，按文件顺序在主进程中合并
+        tasks = [(file_path, self.keywords, self.white_list_keywords) for file_path in excel_files]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for file_data in executor.map(_process_one, tasks):
+                self.merge_file_data(file_data)
         
     
     def save_to_json(self, output_path: str):
@@ -290,17 +417,11 @@ class ExcelColumnExtractor:
         Args:
             output_path: 输出JSON文件路径
         """
-
+        # 转换为可序列化的格式：去掉空列，集合排序后输出
+        json_data = {col_name: sorted(values) for col_name, values in self.all_data.items() if values}
         
-        # 转换为可序列化的格式
-        # json_data = {}
-        # for col_name, values in self.all_data.items():
-        #     # 将set转换为list，并对数值进行排序
-        #     sorted_values = sorted(list(values), key=lambda x: str(x))
-        #     json_data[col_name] = sorted_values
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.all_data, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
         
         print(f"结果已保存到: {output_path}")
         
@@ -309,6 +430,21 @@ class ExcelColumnExtractor:
         # for col_name, values in json_data.items():
         #     print(f"  {col_name}: {len(values)} 个唯一值")
 
+def _process_one(args: Tuple[str, List[str], List[str]]) -> Dict[str, Set[str]]:
+    """
+    子进程入口：只传递文件路径和关键词，避免序列化整个提取器
+    
+    Args:
+        args: (文件路径, 跳过关键词, 白名单关键词)
+        
+    Returns:
+        Dict[str, Set[str]]: 该文件各列提取到的去重值
+    """
+    file_path, keywords, white_list_keywords = args
+    print(f"正在处理: {os.path.basename(file_path)}")
+    extractor = ExcelColumnExtractor(keywords=keywords, white_list_keywords=white_list_keywords)
+    return extractor.process_excel_file(file_path)
+
 def main():
     """
     主函数
@@ -329,7 +465,8 @@ def main():
     # 处理文件夹
     extractor.process_folder(folder_path)
     
-    if not extractor.all_data:
+    # all_data 会保留没有取到值的空列，需要判断是否有任何一列有值
+    if not any(extractor.all_data.values()):
         print("没有提取到任何数据")
         return
     
@@ -341,8 +478,9 @@ def main():
     
     # 显示提取的列信息
     print("\n提取的列:")
-    for col_name in extractor.all_data.keys():
-        print(f"  - {col_name}")
+    for col_name, values in extractor.all_data.items():
+        if values:
+            print(f"  - {col_name}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
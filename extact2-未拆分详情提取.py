@@ -1,14 +1,30 @@
 import os
 import pandas as pd
-import json
+import numpy as np
+import orjson
 import re
 from typing import Dict, List, Set, Any
 import warnings
-from thefuzz import process, fuzz
+from rapidfuzz import fuzz, utils
+from rapidfuzz.process import cdist
 
 
 warnings.filterwarnings('ignore')
 
+# 报价描述的分隔符：逗号或分号
+_SPLIT_RE = re.compile(r'[,;]')
+
+# thefuzz 的 force_ascii 预处理：去掉 128-255 范围内的字符
+_FORCE_ASCII_TABLE = {i: None for i in range(128, 256)}
+
+def _full_process(s: str) -> str:
+    """与 thefuzz.utils.full_process(s, force_ascii=True) 相同的预处理"""
+    return utils.default_process(s.translate(_FORCE_ASCII_TABLE))
+
+def _sorted_tokens(s: str) -> str:
+    """token_sort_ratio 的预处理结果：分词排序后重新拼接，对其计算 ratio 即等价于 token_sort_ratio"""
+    return " ".join(sorted(_full_process(s).split()))
+
 class ExcelColumnExtractor:
     def __init__(self, keywords: List[str] = None, white_list_keywords: List[str] = None):
         """
@@ -19,56 +35,73 @@ class ExcelColumnExtractor:
         """
         self.keywords = keywords
         self.white_list_keywords = white_list_keywords
+        # 关键词统一转小写后编译为一个正则，列名只需匹配一次
+        self._skip_re = self._compile_keywords(keywords)
+        self._white_list_re = self._compile_keywords(white_list_keywords)
         self.orign_data = dict()
         self.process_data = dict()
-    def is_number(self, s):
-        try:
-            float(s)  # 尝试转换为浮点数
-            return True
-        except ValueError:
-            return False
+        # 映射值的模糊匹配预处理结果，按列缓存，所有文件共用
+        self._prep_map: Dict[str, List[str]] = {}
+    def _compile_keywords(self, keywords: List[str]):
+        """将关键词列表编译为小写的多选正则，列表为空时返回None"""
+        if not keywords:
+            return None
+        return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
+    def drop_numeric_values(self, values) -> List[str]:
+        """批量去掉数值、空字符串和"-"，整列一次 to_numeric 代替逐个 float() 试转换"""
+        series = pd.Series(list(values), dtype=object)
+        if series.empty:
+            return []
+        # to_numeric 把 "nan" 转成缺失值，而 float("nan") 能成功转换，需要单独按数值处理
+        is_number = (pd.to_numeric(series, errors='coerce').notna()
+                     | series.str.strip().str.lower().isin(['nan', '-nan', '+nan']))
+        return series[~is_number & ~series.isin(['', '-'])].tolist()
     def read_json_file(self):
         """读取JSON文件并返回数据"""
         try:
-            with open("extracted_columns.json", 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            with open("extracted_columns.json", 'rb') as file:
+                data = orjson.loads(file.read())
             return data
         except Exception as e:
             print(f"读取文件时出错: {e}")
             return None
-    def is_header_row(self, df_slice: pd.DataFrame, row_index: int) -> bool:
+    def cell_type_codes(self, df_slice: pd.DataFrame) -> np.ndarray:
         """
-        判断某行是否为表头行
+        计算单元格类型编码矩阵
         
         Args:
             df_slice: DataFrame切片（前10行）
+            
+        Returns:
+            np.ndarray: 与切片同形状的int8矩阵，0为空，1为字符串，2为其他类型
+        """
+        to_code = np.vectorize(lambda v: 0 if pd.isna(v) else (1 if isinstance(v, str) else 2), otypes=[np.int8])
+        return to_code(df_slice.values)
+    
+    def is_header_row(self, types: np.ndarray, row_index: int) -> bool:
+        """
+        判断某行是否为表头行
+        
+        Args:
+            types: 前10行的单元格类型编码矩阵
             row_index: 当前行索引
             
         Returns:
             bool: 是否为表头行
         """
-        if row_index >= len(df_slice) - 1:
+        if row_index >= len(types) - 1:
             return False
             
-        current_row = df_slice.iloc[row_index]
-        next_row = df_slice.iloc[row_index + 1]
-        
         # 计算当前行非空单元格数量
-        non_empty_cells = current_row.dropna()
-        if len(non_empty_cells) == 0:
+        non_empty_cells = np.count_nonzero(types[row_index])
+        if non_empty_cells == 0:
             return False
             
         # 计算字符串类型单元格比例
-        string_cells = 0
-        for cell in non_empty_cells:
-            if isinstance(cell, str):
-                string_cells += 1
-        
-        string_ratio = string_cells / len(non_empty_cells)
+        string_ratio = np.count_nonzero(types[row_index] == 1) / non_empty_cells
         
         # 检查下一行是否有数值或非空内容
-        next_row_non_empty = next_row.dropna()
-        has_next_row_data = len(next_row_non_empty) > 0
+        has_next_row_data = np.count_nonzero(types[row_index + 1]) > 0
         
         # 判断条件：字符串比例超过50%且下一行有数据
         return string_ratio > 0.5 and has_next_row_data
@@ -83,11 +116,12 @@ class ExcelColumnExtractor:
         Returns:
             int: 表头行索引
         """
-        # 只检查前10行
+        # 只检查前10行，类型编码只计算一次
         check_rows = min(10, len(df))
+        types = self.cell_type_codes(df.iloc[:check_rows])
         
         for i in range(check_rows - 1):
-            if self.is_header_row(df.iloc[:check_rows], i):
+            if self.is_header_row(types, i):
                 return i
         
         # 如果没有找到符合条件表头，默认使用第一行
@@ -134,9 +168,8 @@ class ExcelColumnExtractor:
             return False
             
         column_name_str = str(column_name)
-        for keyword in self.keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
+        if self._skip_re is not None and self._skip_re.search(column_name_str.lower()):
+            return True
         return False
     def is_in_white_list(self, column_name: str) -> bool:
         """
@@ -152,10 +185,32 @@ class ExcelColumnExtractor:
             return False;
             
         column_name_str = str(column_name)
-        for keyword in self.white_list_keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
-        return False
+        return self._white_list_re is not None and bool(self._white_list_re.search(column_name_str.lower()))
+    def best_fuzzy_scores(self, queries: List[str], map_data: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        批量模糊匹配：每个映射列只调用一次cdist，计算所有待匹配值的相似度矩阵
+        
+        Args:
+            queries: 待匹配的值
+            map_data: 映射列名 -> 映射值列表
+            
+        Returns:
+            Dict[str, Dict[str, int]]: 映射列名 -> {待匹配值: 最高得分}，低于80分记为0
+        """
+        # 与 thefuzz.process.extractBests 的预处理保持一致，分词排序只做一次
+        prepared_queries = [_sorted_tokens(utils.default_process(query)) for query in queries]
+        scores = {}
+        for map_col_name, map_values in map_data.items():
+            if not queries or not map_values:
+                scores[map_col_name] = dict.fromkeys(queries, 0)
+                continue
+            if map_col_name not in self._prep_map:
+                self._prep_map[map_col_name] = [_sorted_tokens(map_value) for map_value in map_values]
+            matrix = cdist(prepared_queries, self._prep_map[map_col_name], scorer=fuzz.ratio,
+                           processor=None, score_cutoff=80, workers=-1)
+            best = np.rint(matrix.max(axis=1)).astype(int)
+            scores[map_col_name] = dict(zip(queries, best.tolist()))
+        return scores
     def process_excel_file(self, file_path: str):
         """
         处理单个Excel文件
@@ -188,24 +243,21 @@ class ExcelColumnExtractor:
             # 处理表头
             column_names = self.process_header(header_row, first_data_row)
             
-            # 读取数据（跳过表头行）
-            data_df = pd.read_excel(file_path, sheet_name=0, header=None, 
-                                  skiprows=data_start_row)
-            
             self.orign_data[file_path] = []
             current_file_data = self.orign_data[file_path]
-            # 处理每一列
-            for col_idx, col_name in enumerate(column_names):
-                if col_idx >= data_df.shape[1]:
-                    continue
-                    
-                # if self.should_skip_column(col_name):
-                #     continue
-                if not self.is_in_white_list(col_name):
-                    continue
-                # 获取该列数据并去重
-                column_data = data_df.iloc[:, col_idx].dropna()
-                current_file_data.extend(column_data)   
+            
+            # 先按列名筛选，只读取白名单中的列
+            keep_idx = [col_idx for col_idx, col_name in enumerate(column_names) if self.is_in_white_list(col_name)]
+            if not keep_idx:
+                return
+            
+            # 数据行直接从已读取的DataFrame中截取，不再重复读取文件
+            data_df = df.iloc[data_start_row:, keep_idx]
+            
+            # 按列遍历截取后的数据，不再逐列按索引取值
+            for _, column_data in data_df.items():
+                # 获取该列非空数据
+                current_file_data.extend(column_data.dropna())   
                 # 转换为合适的类型并去重
                 # processed_data = list()
                 # for item in column_data:
@@ -243,11 +295,10 @@ class ExcelColumnExtractor:
             print(f"错误: 文件夹路径 {folder_path} 不存在")
             return
         
-        # 查找所有Excel文件
-        excel_files = []
-        for file in os.listdir(folder_path):
-            if file.endswith(('.xlsx', '.xls')):
-                excel_files.append(os.path.join(folder_path, file))
+        # 查找所有Excel文件（扩展名不区分大小写）
+        with os.scandir(folder_path) as entries:
+            excel_files = [entry.path for entry in entries
+                           if entry.is_file() and entry.name.lower().endswith(('.xlsx', '.xls', '.xlsm'))]
         
         if not excel_files:
             print(f"在文件夹 {folder_path} 中未找到Excel文件")
@@ -262,24 +313,24 @@ class ExcelColumnExtractor:
         
         # 处理报价详情，分割数据，映射数据
         orign_map_data = self.read_json_file()
+        self._prep_map = {}
         raw_set = set()
         for file_path, file_data in self.orign_data.items():
             print(f"文件 {file_path}:")
         
             for value in file_data:
-                split1 = str(value).split(',')
-                split2 = str(value).split(';')
-                split = split1 if len(split1) > len(split2) else split2;
+                # 逗号和分号一次切分
+                split = [item.strip().replace("\n", " ") for item in _SPLIT_RE.split(str(value))]
                 if len(split) <= 2: continue
-                split = [str(item).strip().replace("\n", " ") for item in split]
                 raw_set.update(split)
                 
         print(raw_set)       
         for key in orign_map_data.keys():
             self.process_data[key] = list()
         self.process_data['未找到'] = list()
-        for raw_value in raw_set:
-            if self.is_number(raw_value) or raw_value == '' or raw_value == '-': continue
+        raw_values = self.drop_numeric_values(raw_set)
+        fuzzy_scores = self.best_fuzzy_scores(raw_values, orign_map_data)
+        for raw_value in raw_values:
             is_match = False
             best_match_score = 0
             best_match_name = ''
@@ -291,9 +342,9 @@ class ExcelColumnExtractor:
                         break
                 if is_match: continue
 
-                best_match = process.extractBests(raw_value, map_values, scorer=fuzz.token_sort_ratio, score_cutoff=80, limit=1)
-                if len(best_match) > 0 and best_match[0][1] > best_match_score:
-                    best_match_score = best_match[0][1]
+                score = fuzzy_scores[map_col_name][raw_value]
+                if score > best_match_score:
+                    best_match_score = score
                     best_match_name = map_col_name
                     is_match = True
                     self.process_data[map_col_name].append(raw_value)
@@ -319,8 +370,8 @@ class ExcelColumnExtractor:
             sorted_values = sorted(values)
             json_data[col_name] = sorted_values
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(json_data, option=orjson.OPT_INDENT_2))
         
         print(f"结果已保存到: {output_path}")
         
@@ -1,14 +1,31 @@
 import os
 import pandas as pd
-import json
+import numpy as np
+from openpyxl import Workbook
+import orjson
 import re
 from typing import Dict, List, Set, Any
 import warnings
-from thefuzz import process, fuzz
+from rapidfuzz import fuzz, utils
+from rapidfuzz.process import cdist
 
 
 warnings.filterwarnings('ignore')
 
+# 报价描述的分隔符：逗号或分号
+_SPLIT_RE = re.compile(r'[,;]')
+
+# thefuzz 的 force_ascii 预处理：去掉 128-255 范围内的字符
+_FORCE_ASCII_TABLE = {i: None for i in range(128, 256)}
+
+def _full_process(s: str) -> str:
+    """与 thefuzz.utils.full_process(s, force_ascii=True) 相同的预处理"""
+    return utils.default_process(s.translate(_FORCE_ASCII_TABLE))
+
+def _sorted_tokens(s: str) -> str:
+    """token_sort_ratio 的预处理结果：分词排序后重新拼接，对其计算 ratio 即等价于 token_sort_ratio"""
+    return " ".join(sorted(_full_process(s).split()))
+
 class ExcelColumnExtractor:
     def __init__(self, keywords: List[str] = None, white_list_keywords: List[str] = None):
         """
@@ -19,56 +36,73 @@ class ExcelColumnExtractor:
         """
         self.keywords = keywords
         self.white_list_keywords = white_list_keywords
+        # 关键词统一转小写后编译为一个正则，列名只需匹配一次
+        self._skip_re = self._compile_keywords(keywords)
+        self._white_list_re = self._compile_keywords(white_list_keywords)
         self.orign_data = {}
         self.process_data = {}
-    def is_number(self, s):
-        try:
-            float(s)  # 尝试转换为浮点数
-            return True
-        except ValueError:
-            return False
+        # 映射值的模糊匹配预处理结果，按列缓存，所有文件共用
+        self._prep_map: Dict[str, List[str]] = {}
+    def _compile_keywords(self, keywords: List[str]):
+        """将关键词列表编译为小写的多选正则，列表为空时返回None"""
+        if not keywords:
+            return None
+        return re.compile('|'.join(re.escape(keyword.lower()) for keyword in keywords))
+    def drop_numeric_values(self, values) -> List[str]:
+        """批量去掉数值、空字符串和"-"，整列一次 to_numeric 代替逐个 float() 试转换"""
+        series = pd.Series(list(values), dtype=object)
+        if series.empty:
+            return []
+        # to_numeric 把 "nan" 转成缺失值，而 float("nan") 能成功转换，需要单独按数值处理
+        is_number = (pd.to_numeric(series, errors='coerce').notna()
+                     | series.str.strip().str.lower().isin(['nan', '-nan', '+nan']))
+        return series[~is_number & ~series.isin(['', '-'])].tolist()
     def read_json_file(self):
         """读取JSON文件并返回数据"""
         try:
-            with open("extracted_columns.json", 'r', encoding='utf-8') as file:
-                data = json.load(file)
+            with open("extracted_columns.json", 'rb') as file:
+                data = orjson.loads(file.read())
             return data
         except Exception as e:
             print(f"读取文件时出错: {e}")
             return None
-    def is_header_row(self, df_slice: pd.DataFrame, row_index: int) -> bool:
+    def cell_type_codes(self, df_slice: pd.DataFrame) -> np.ndarray:
         """
-        判断某行是否为表头行
+        计算单元格类型编码矩阵
         
         Args:
             df_slice: DataFrame切片（前10行）
+            
+        Returns:
+            np.ndarray: 与切片同形状的int8矩阵，0为空，1为字符串，2为其他类型
+        """
+        to_code = np.vectorize(lambda v: 0 if pd.isna(v) else (1 if isinstance(v, str) else 2), otypes=[np.int8])
+        return to_code(df_slice.values)
+    
+    def is_header_row(self, types: np.ndarray, row_index: int) -> bool:
+        """
+        判断某行是否为表头行
+        
+        Args:
+            types: 前10行的单元格类型编码矩阵
             row_index: 当前行索引
             
         Returns:
             bool: 是否为表头行
         """
-        if row_index >= len(df_slice) - 1:
+        if row_index >= len(types) - 1:
             return False
             
-        current_row = df_slice.iloc[row_index]
-        next_row = df_slice.iloc[row_index + 1]
-        
         # 计算当前行非空单元格数量
-        non_empty_cells = current_row.dropna()
-        if len(non_empty_cells) == 0:
+        non_empty_cells = np.count_nonzero(types[row_index])
+        if non_empty_cells == 0:
             return False
             
         # 计算字符串类型单元格比例
-        string_cells = 0
-        for cell in non_empty_cells:
-            if isinstance(cell, str):
-                string_cells += 1
-        
-        string_ratio = string_cells / len(non_empty_cells)
+        string_ratio = np.count_nonzero(types[row_index] == 1) / non_empty_cells
         
         # 检查下一行是否有数值或非空内容
-        next_row_non_empty = next_row.dropna()
-        has_next_row_data = len(next_row_non_empty) > 0
+        has_next_row_data = np.count_nonzero(types[row_index + 1]) > 0
         
         # 判断条件：字符串比例超过50%且下一行有数据
         return string_ratio > 0.5 and has_next_row_data
@@ -83,11 +117,12 @@ class ExcelColumnExtractor:
         Returns:
             int: 表头行索引
         """
-        # 只检查前10行
+        # 只检查前10行，类型编码只计算一次
         check_rows = min(10, len(df))
+        types = self.cell_type_codes(df.iloc[:check_rows])
         
         for i in range(check_rows - 1):
-            if self.is_header_row(df.iloc[:check_rows], i):
+            if self.is_header_row(types, i):
                 return i
         
         # 如果没有找到符合条件表头，默认使用第一行
@@ -134,9 +169,8 @@ class ExcelColumnExtractor:
             return False
             
         column_name_str = str(column_name)
-        for keyword in self.keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
+        if self._skip_re is not None and self._skip_re.search(column_name_str.lower()):
+            return True
         return False
     def is_in_white_list(self, column_name: str) -> bool:
         """
@@ -152,10 +186,32 @@ class ExcelColumnExtractor:
             return False;
             
         column_name_str = str(column_name)
-        for keyword in self.white_list_keywords:
-            if keyword.lower() in column_name_str.lower():
-                return True
-        return False
+        return self._white_list_re is not None and bool(self._white_list_re.search(column_name_str.lower()))
+    def best_fuzzy_scores(self, queries: List[str], map_data: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+        """
+        批量模糊匹配：每个映射列只调用一次cdist，计算所有待匹配值的相似度矩阵
+        
+        Args:
+            queries: 待匹配的值
+            map_data: 映射列名 -> 映射值列表
+            
+        Returns:
+            Dict[str, Dict[str, int]]: 映射列名 -> {待匹配值: 最高得分}，低于80分记为0
+        """
+        # 与 thefuzz.process.extractBests 的预处理保持一致，分词排序只做一次
+        prepared_queries = [_sorted_tokens(utils.default_process(query)) for query in queries]
+        scores = {}
+        for map_col_name, map_values in map_data.items():
+            if not queries or not map_values:
+                scores[map_col_name] = dict.fromkeys(queries, 0)
+                continue
+            if map_col_name not in self._prep_map:
+                self._prep_map[map_col_name] = [_sorted_tokens(map_value) for map_value in map_values]
+            matrix = cdist(prepared_queries, self._prep_map[map_col_name], scorer=fuzz.ratio,
+                           processor=None, score_cutoff=80, workers=-1)
+            best = np.rint(matrix.max(axis=1)).astype(int)
+            scores[map_col_name] = dict(zip(queries, best.tolist()))
+        return scores
     def process_excel_file(self, file_path: str):
         """
         处理单个Excel文件
@@ -188,24 +244,21 @@ class ExcelColumnExtractor:
             # 处理表头
             column_names = self.process_header(header_row, first_data_row)
             
-            # 读取数据（跳过表头行）
-            data_df = pd.read_excel(file_path, sheet_name=0, header=None, 
-                                  skiprows=data_start_row)
-            
             self.orign_data[file_path] = []
             current_file_data = self.orign_data[file_path]
-            # 处理每一列
-            for col_idx, col_name in enumerate(column_names):
-                if col_idx >= data_df.shape[1]:
-                    continue
-                    
-                # if self.should_skip_column(col_name):
-                #     continue
-                if not self.is_in_white_list(col_name):
-                    continue
-                # 获取该列数据并去重
-                column_data = data_df.iloc[:, col_idx].dropna()
-                current_file_data.extend(column_data)   
+            
+            # 先按列名筛选，只读取白名单中的列
+            keep_idx = [col_idx for col_idx, col_name in enumerate(column_names) if self.is_in_white_list(col_name)]
+            if not keep_idx:
+                return
+            
+            # 数据行直接从已读取的DataFrame中截取，不再重复读取文件
+            data_df = df.iloc[data_start_row:, keep_idx]
+            
+            # 按列遍历截取后的数据，不再逐列按索引取值
+            for _, column_data in data_df.items():
+                # 获取该列非空数据
+                current_file_data.extend(column_data.dropna())   
                 # 转换为合适的类型并去重
                 # processed_data = list()
                 # for item in column_data:
@@ -243,11 +296,10 @@ class ExcelColumnExtractor:
             print(f"错误: 文件夹路径 {folder_path} 不存在")
             return
         
-        # 查找所有Excel文件
-        excel_files = []
-        for file in os.listdir(folder_path):
-            if file.endswith(('.xlsx', '.xls')):
-                excel_files.append(os.path.join(folder_path, file))
+        # 查找所有Excel文件（扩展名不区分大小写）
+        with os.scandir(folder_path) as entries:
+            excel_files = [entry.path for entry in entries
+                           if entry.is_file() and entry.name.lower().endswith(('.xlsx', '.xls', '.xlsm'))]
         
         if not excel_files:
             print(f"在文件夹 {folder_path} 中未找到Excel文件")
@@ -262,22 +314,29 @@ class ExcelColumnExtractor:
         
         # 处理报价详情，分割数据，映射数据
         orign_map_data = self.read_json_file()
+        self._prep_map = {}
         for file_path, file_data in self.orign_data.items():
             print(f"文件 {file_path}:")
             cur_file = self.process_data[file_path] = []
+            file_splits = []
             for value in file_data:
-                split1 = str(value).split(',')
-                split2 = str(value).split(';')
-                split = split1 if len(split1) > len(split2) else split2;
-                split = [str(item).strip().replace("\n", " ") for item in split]
-                row_data = {}
+                # 逗号和分号一次切分
+                split = [item.strip().replace("\n", " ") for item in _SPLIT_RE.split(str(value))]
+                file_splits.append((value, split))
+            
+            # 本文件所有拆分值一次性批量模糊匹配（标准、材质列只按包含匹配）
+            queries = self.drop_numeric_values({split_value for _, split in file_splits for split_value in split})
+            query_set = set(queries)
+            fuzzy_map_data = {key: values for key, values in orign_map_data.items() if key not in ("标准", "材质")}
+            fuzzy_scores = self.best_fuzzy_scores(queries, fuzzy_map_data)
+            
+            # 每行输出的模板，按行复制后只需填入描述
+            prototype = {"description": "", **{key: "" for key in orign_map_data}, '备注': ""}
+            for value, split in file_splits:
+                row_data = prototype.copy()
                 row_data["description"] = value
-                
-                for key in orign_map_data.keys():
-                    row_data[key] = ""
-                row_data['备注'] = "" 
                 for split_value in split:
-                    if self.is_number(split_value) or split_value == '' or split_value == '-': continue
+                    if split_value not in query_set: continue
                     best_match_score = 0
                     is_match = False
                     for map_col_name, map_values in orign_map_data.items(): 
@@ -297,8 +356,7 @@ class ExcelColumnExtractor:
                                     break
                             continue
 
-                        best_match = process.extractBests(split_value, map_values, scorer=fuzz.token_sort_ratio, score_cutoff=80, limit=1)
-                        if len(best_match) > 0 and best_match[0][1] > best_match_score:
+                        if fuzzy_scores[map_col_name][split_value] > best_match_score:
                             is_match = True
                             if map_col_name == '名称':
                                 row_data[map_col_name] = split_value
@@ -324,8 +382,8 @@ class ExcelColumnExtractor:
         #     sorted_values = sorted(list(values), key=lambda x: str(x))
         #     json_data[col_name] = sorted_values
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.process_data, f, ensure_ascii=False, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(self.process_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         
         print(f"结果已保存到: {output_path}")
         
@@ -349,8 +407,10 @@ class ExcelColumnExtractor:
             else:
                 base_name = file_path
             
-            # 分离文件名和扩展名
+            # 分离文件名和扩展名，openpyxl 不能写 xls，改为 xlsx
             name_without_ext, ext = os.path.splitext(base_name)
+            if ext.lower() == '.xls':
+                ext = '.xlsx'
             
             # 在文件名后添加"自动拆解"
             new_file_name = f"{name_without_ext}-自动拆解{ext}"
@@ -358,9 +418,14 @@ class ExcelColumnExtractor:
             # 创建完整的输出路径
             output_path = os.path.join(output_dir, new_file_name)
             
-            # 创建DataFrame并写入Excel
-            df = pd.DataFrame(records)
-            df.to_excel(output_path, index=False)
+            # 以只写模式逐行写入Excel，不在内存中保留整张表
+            workbook = Workbook(write_only=True)
+            worksheet = workbook.create_sheet("Sheet1")
+            if records:
+                worksheet.append(list(records[0].keys()))
+                for record in records:
+                    worksheet.append(list(record.values()))
+            workbook.save(output_path)
             
             print(f"已创建文件: {new_file_name}")
 
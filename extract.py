@@ -2,7 +2,6 @@ import os
 import pandas as pd
 import json
 from collections import defaultdict
-import glob
 
 def extract_unique_values_from_excels(folder_path):
     """
@@ -15,12 +14,12 @@ def extract_unique_values_from_excels(folder_path):
         dict: 包含所有列去重值的字典
     """
     # 支持的文件扩展名
-    excel_extensions = ['*.xlsx', '*.xls', '*.xlsm']
+    excel_extensions = {'.xlsx', '.xls', '.xlsm'}
     
-    # 获取所有Excel文件路径
-    excel_files = []
-    for extension in excel_extensions:
-        excel_files.extend(glob.glob(os.path.join(folder_path, extension)))
+    # 获取所有Excel文件路径（只遍历一次目录）
+    with os.scandir(folder_path) as entries:
+        excel_files = [entry.path for entry in entries
+                       if entry.is_file() and os.path.splitext(entry.name)[1].lower() in excel_extensions]
     
     if not excel_files:
         print(f"在文件夹 {folder_path} 中未找到Excel文件")
@@ -33,13 +32,13 @@ def extract_unique_values_from_excels(folder_path):
         print(f"正在处理文件: {os.path.basename(file_path)}")
         
         try:
-            # 读取Excel文件的所有sheet
+            # 读取Excel文件的所有sheet，工作簿只打开解析一次
             excel_file = pd.ExcelFile(file_path)
             
             for sheet_name in excel_file.sheet_names:
                 try:
                     # 读取sheet数据
-                    df = pd.read_excel(file_path, sheet_name=sheet_name, header=None)
+                    df = excel_file.parse(sheet_name=sheet_name, header=None)
                     
                     if df.empty:
                         continue
@@ -49,7 +48,7 @@ def extract_unique_values_from_excels(folder_path):
                     
                     if header_row is not None:
                         # 重新读取数据，使用检测到的表头
-                        df = pd.read_excel(file_path, sheet_name=sheet_name, header=header_row)
+                        df = excel_file.parse(sheet_name=sheet_name, header=header_row)
                         
                         # 处理列名，确保都是字符串且去除前后空格
                         df.columns = [str(col).strip() if pd.notna(col) else f"Column_{i}" 
@@ -57,15 +56,15 @@ def extract_unique_values_from_excels(folder_path):
                         
                         # 排除DESCRIPTION列（不区分大小写）
                         columns_to_process = [col for col in df.columns 
-                                            if 'DESCRIPTION'.lower() in str(col).lower ||  ]
+                                            if 'description' not in str(col).lower()]
                         
                         # 提取每列的非空唯一值
                         for column in columns_to_process:
-                            # 获取非空值并转换为字符串
-                            non_null_values = df[column].dropna().astype(str)
-                            # 去除前后空格并添加到集合中
-                            unique_vals = set(val.strip() for val in non_null_values if val.strip())
-                            all_unique_values[column].update(unique_vals)
+                            # 获取非空值并转换为字符串，整列去除前后空格
+                            non_null_values = df[column].dropna().astype(str).str.strip()
+                            # 去掉空字符串后整列去重并添加到集合中
+                            non_null_values = non_null_values[non_null_values != '']
+                            all_unique_values[column].update(non_null_values.unique().tolist())
                             
                     else:
                         print(f"  在Sheet '{sheet_name}' 中未找到合适的表头，跳过处理")
@@ -1,9 +1,66 @@
+import io
 import os
 import pandas as pd
 import numpy as np
-import json
-from typing import List, Dict, Set
+import orjson
+from datetime import date, datetime
+from typing import Any, List, Dict, Set, Tuple
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+# 优先使用基于Rust的calamine直接逐行读取Excel，未安装python-calamine时回退到pandas
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# 纯数字文本（如 "12"、"-3.5"）
+_NUMERIC_RE = re.compile(r'^-?\d+\.?\d*$')
+
+# pandas读取Excel时默认视为缺失值的文本，直接读取单元格时同样按空单元格处理
+_NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+
+def _normalize_cell(value: Any) -> Any:
+    """
+    将单元格值规整为与pandas读取结果一致的形式：空单元格和缺失值文本为None，整数值的浮点数转为int，日期转为datetime
+    
+    Args:
+        value: 原始单元格值
+        
+    Returns:
+        Any: 规整后的值
+    """
+    if value is None or (isinstance(value, str) and value in _NA_STRINGS):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _read_sheet_rows(file_path: str) -> List[list]:
+    """
+    读取Excel文件第一个工作表的所有行，不构建DataFrame
+    
+    Args:
+        file_path: Excel文件路径
+        
+    Returns:
+        List[list]: 各行单元格的原始值，空单元格为""或None
+    """
+    if CalamineWorkbook is not None:
+        # 一次顺序读入整个文件再交给calamine解析，避免解析过程中对网络存储的多次随机读
+        with open(file_path, 'rb') as f:
+            buffer = io.BytesIO(f.read())
+        sheet = CalamineWorkbook.from_filelike(buffer).get_sheet_by_index(0)
+        return sheet.to_python(skip_empty_area=False)
+    df = pd.read_excel(file_path, sheet_name=0, header=None)
+    return df.astype(object).where(df.notna(), None).to_numpy().tolist()
 
 class ExcelDataExtractor:
     def __init__(self, folder_path: str, skip_keywords: List[str] = None):
@@ -17,73 +74,58 @@ class ExcelDataExtractor:
         self.folder_path = folder_path
         self.skip_keywords = skip_keywords or ["备注", "说明", "附件", "Note", "Description", "Attachment"]
         self.all_data = {}  # 存储所有提取的数据
+        # 将跳过关键词预编译为一个正则，一次扫描即可判断列名
+        self._skip_re = (re.compile('|'.join(map(re.escape, self.skip_keywords)))
+                         if self.skip_keywords else None)
     
-    def is_header_row(self, df: pd.DataFrame, row_index: int) -> bool:
+    def _is_header_row_arr(self, current_row: np.ndarray, next_row: np.ndarray) -> bool:
         """
-        判断指定行是否为表头行
+        判断某行是否为表头行（直接作用于行数组）
         
         Args:
-            df: DataFrame对象
-            row_index: 行索引
+            current_row: 当前行的值数组
+            next_row: 下一行的值数组
             
         Returns:
             bool: 是否为表头行
         """
-        if row_index >= len(df) - 1:
-            return False
-        
-        current_row = df.iloc[row_index]
-        next_row = df.iloc[row_index + 1]
-        
-        # 计算当前行中非空单元格数量
-        non_empty_cells = current_row.notna()
-        if non_empty_cells.sum() == 0:
-            return False
-        
-        # 计算字符串类型单元格的比例
-        string_cells = 0
-        total_non_empty = 0
-        
-        for col in range(len(current_row)):
-            if pd.notna(current_row.iloc[col]):
-                total_non_empty += 1
-                cell_value = current_row.iloc[col]
-                # 检查是否为字符串类型
-                if isinstance(cell_value, str):
-                    string_cells += 1
-                # 对于其他类型，如果能够转换为字符串且不是纯数字，也认为是字符串
-                elif pd.notna(cell_value):
-                    try:
-                        str_value = str(cell_value).strip()
-                        if str_value and not re.match(r'^-?\d+\.?\d*$', str_value):
-                            string_cells += 1
-                    except:
-                        pass
-        
+        # 当前行中的非空单元格
+        non_empty_values = current_row[pd.notna(current_row)]
+        total_non_empty = len(non_empty_values)
         if total_non_empty == 0:
             return False
         
+        # 计算字符串类型单元格的比例（type() is str 直接比较类型指针，比 isinstance 更快）
+        is_string = np.fromiter((type(cell_value) is str for cell_value in non_empty_values),
+                                dtype=bool, count=total_non_empty)
+        # 对于其他类型，如果能够转换为字符串且不是纯数字，也认为是字符串；数值单元格直接跳过
+        other_values = [str(cell_value).strip() for cell_value in non_empty_values[~is_string]
+                        if isinstance(cell_value, bool)
+                        or not isinstance(cell_value, (int, float, np.integer, np.floating))]
+        string_cells = int(is_string.sum()) + sum(1 for str_value in other_values
+                                            if str_value and not _NUMERIC_RE.match(str_value))
+        
         string_ratio = string_cells / total_non_empty
         
         # 检查下一行是否有数值或非空内容
-        next_row_has_content = next_row.notna().sum() > 0
+        next_row_has_content = pd.notna(next_row).any()
         
         # 如果字符串比例超过50%且下一行有内容，则认为是表头行
         return string_ratio > 0.5 and next_row_has_content
     
-    def find_header_row(self, df: pd.DataFrame) -> int:
+    def _find_header_row_arr(self, rows: np.ndarray) -> int:
         """
-        查找表头行
+        在前几行的值数组中查找表头行（直接作用于二维数组）
         
         Args:
-            df: DataFrame对象
+            rows: 前11行的二维值数组
             
         Returns:
             int: 表头行索引，如果找不到返回0
         """
         # 在前10行中查找表头行
-        for i in range(min(10, len(df) - 1)):
-            if self.is_header_row(df, i):
+        for i in range(min(10, len(rows) - 1)):
+            if self._is_header_row_arr(rows[i], rows[i + 1]):
                 return i
         return 0  # 如果找不到，默认使用第一行
     
@@ -105,90 +147,73 @@ class ExcelDataExtractor:
                 return "Unnamed"
         return str(col_name).strip()
     
-    def should_skip_column(self, column_name: str) -> bool:
+    def extract_data_from_file(self, file_path: str) -> Dict[str, Set[str]]:
         """
-        判断是否应该跳过该列
+        从单个Excel文件中提取数据，不修改提取器状态，便于在子进程中执行
         
         Args:
-            column_name: 列名
+            file_path: Excel文件路径
             
         Returns:
-            bool: 是否跳过
-        """
-        if pd.isna(column_name):
-            return False
-        
-        col_name_str = str(column_name).strip()
-        for keyword in self.skip_keywords:
-            if keyword in col_name_str:
-                return True
-        return False
-    
-    def extract_data_from_file(self, file_path: str):
-        """
-        从单个Excel文件中提取数据
-        
-        Args:
-            file_path: Excel文件路径
+            Dict[str, Set[str]]: 该文件各列提取到的去重值
         """
+        file_data: Dict[str, Set[str]] = {}
         try:
-            # 读取Excel文件的第一个工作表
-            df = pd.read_excel(file_path, sheet_name=0, header=None)
+            # 逐行读取Excel文件的第一个工作表
+            rows = _read_sheet_rows(file_path)
             print(f"处理文件: {os.path.basename(file_path)}")
-            print(f"数据形状: {df.shape}")
+            print(f"数据形状: ({len(rows)}, {len(rows[0]) if rows else 0})")
             
-            if df.empty:
+            if not rows or not rows[0]:
                 print(f"警告: 文件 {file_path} 为空")
-                return
+                return file_data
             
-            # 查找表头行
-            header_row_idx = self.find_header_row(df)
+            # 只用前11行的数组查找表头行，不构建DataFrame
+            preview = [[_normalize_cell(cell) for cell in row] for row in rows[:11]]
+            header_row_idx = self._find_header_row_arr(np.array(preview, dtype=object))
             print(f"找到表头行: 第{header_row_idx + 1}行")
             
-            # 设置表头
-            header_row = df.iloc[header_row_idx]
-            
             # 处理列名
+            header_row = preview[header_row_idx]
+            next_row = preview[header_row_idx + 1] if header_row_idx + 1 < len(preview) else None
             processed_headers = []
             for col_idx, header in enumerate(header_row):
-                next_row_value = df.iloc[header_row_idx + 1, col_idx] if header_row_idx + 1 < len(df) else None
+                next_row_value = next_row[col_idx] if next_row is not None else None
                 processed_header = self.process_column_name(header, next_row_value)
                 processed_headers.append(processed_header)
             
-            # 重新读取数据，使用处理后的表头
-            df_with_header = pd.read_excel(file_path, sheet_name=0, header=header_row_idx)
-            df_with_header.columns = processed_headers
-            
             # 数据行从表头行的下一行开始
             data_start_row = header_row_idx + 1
-            data_df = df_with_header.iloc[data_start_row:].reset_index(drop=True)
+            data_rows = rows[data_start_row:]
             
-            print(f"处理后的列名: {list(data_df.columns)}")
+            print(f"处理后的列名: {processed_headers}")
             
-            # 提取每列的数据
-            for column in data_df.columns:
-                if self.should_skip_column(column):
-                    print(f"跳过列: {column}")
-                    continue
-                
-                # 获取该列的非空数据
-                column_data = data_df[column].dropna().tolist()
+            # 用预编译的跳过正则一次性计算所有列是否需要跳过（列名已去掉首尾空格），再只遍历保留的列
+            if self._skip_re is not None:
+                skip_mask = np.asarray(pd.Index(processed_headers).str.contains(self._skip_re, na=False), dtype=bool)
+            else:
+                skip_mask = np.zeros(len(processed_headers), dtype=bool)
+            for col_idx in np.flatnonzero(skip_mask):
+                print(f"跳过列: {processed_headers[col_idx]}")
+            
+            # 提取每列的数据（按位置取列，列名重复时也只取到单列）
+            for col_idx in np.flatnonzero(~skip_mask):
+                column = processed_headers[col_idx]
                 
-                # 初始化该列的集合（如果尚未存在）
-                if column not in self.all_data:
-                    self.all_data[column] = set()
+                # 获取该列规整后的非空数据（空单元格和缺失值文本已转为None）
+                column_data = [_normalize_cell(row[col_idx]) for row in data_rows]
+                column_data = [item for item in column_data if item is not None]
                 
-                # 添加数据到集合中（自动去重）
-                for item in column_data:
-                    if pd.notna(item):
-                        self.all_data[column].add(str(item).strip())
+                # 转为字符串加入集合（自动去重）
+                file_data.setdefault(column, set()).update(str(item).strip() for item in column_data)
                 
-                print(f"列 '{column}': 提取了 {len(column_data)} 个值，去重后 {len(self.all_data[column])} 个")
+                print(f"列 '{column}': 提取了 {len(column_data)} 个值，去重后 {len(file_data[column])} 个")
             
             print("-" * 50)
             
         except Exception as e:
             print(f"处理文件 {file_path} 时出错: {str(e)}")
+        return file_data
     
     def process_all_files(self):
         """
@@ -212,9 +237,12 @@ class ExcelDataExtractor:
         print("开始处理文件...")
         print("=" * 50)
         
-        # 处理每个文件
-        for file_path in excel_files:
-            self.extract_data_from_file(file_path)
+        # 多进程并行解析各文件，在主进程中合并结果
+        tasks = [(file_path, self.skip_keywords) for file_path in excel_files]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for file_data in executor.map(_extract_one, tasks):
+                for column, values in file_data.items():
+                    self.all_data.setdefault(column, set()).update(values)
     
     def save_to_json(self, output_path: str):
         """
@@ -223,16 +251,36 @@ class ExcelDataExtractor:
         Args:
             output_path: 输出JSON文件路径
         """
-        # 将集合转换为列表
-        json_data = {}
-        for column, values_set in self.all_data.items():
-            json_data[column] = sorted(list(values_set))  # 排序以便阅读
-        
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, ensure_ascii=False, indent=2)
+        # 逐列写出JSON，每次只把一列的集合转换为列表，格式与 json.dump(indent=2) 一致
+        with open(output_path, 'wb') as f:
+            if not self.all_data:
+                f.write(b"{}")
+            else:
+                f.write(b"{\n")
+                for i, (column, values_set) in enumerate(self.all_data.items()):
+                    if i:
+                        f.write(b",\n")
+                    values_json = orjson.dumps(sorted(values_set), option=orjson.OPT_INDENT_2)  # 排序以便阅读
+                    f.write(b"  " + orjson.dumps(column) + b": ")
+                    f.write(values_json.replace(b"\n", b"\n  "))
+                f.write(b"\n}")
         
         print(f"数据已保存到: {output_path}")
-        print(f"总共处理了 {len(json_data)} 列数据")
+        print(f"总共处理了 {len(self.all_data)} 列数据")
+
+def _extract_one(args: Tuple[str, List[str]]) -> Dict[str, Set[str]]:
+    """
+    子进程入口：只传递文件路径和跳过关键词，避免序列化整个提取器
+    
+    Args:
+        args: (文件路径, 跳过关键词)
+        
+    Returns:
+        Dict[str, Set[str]]: 该文件各列提取到的去重值
+    """
+    file_path, skip_keywords = args
+    extractor = ExcelDataExtractor(os.path.dirname(file_path), skip_keywords)
+    return extractor.extract_data_from_file(file_path)
 
 def main():
     """